@@ -81,19 +81,23 @@ Version
 # imports
 import json
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 # dependencies
 import pandas as pd
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # customs
-from protflow import jobstarters
 from protflow.jobstarters import JobStarter
 from protflow.poses import Poses
 from protflow.residues import ResidueSelection
 from protflow.runners import Runner, col_in_df
 from protflow.config import PROTFLOW_ENV
 from protflow.config import AUXILIARY_RUNNER_SCRIPTS_DIR
-from protflow.utils.utils import parse_fasta_to_dict
+from protflow.utils.utils import IO_POOL_SIZE
 
 class ChainAdder(Runner):
     """
@@ -350,10 +354,6 @@ class ChainAdder(Runner):
             This method ensures robust error handling and logging for easier debugging and verification of the process.
         """
         # sanity (motif and chain superimposition at the same time is not possible)
-        def output_exists(work_dir, poses):
-            '''checks if output of copying chains exists'''
-            return os.path.isdir(work_dir) and all((os.path.isfile(os.path.join(work_dir, pose.rsplit("/", maxsplit=1)[-1])) for pose in poses.poses_list()))
-
         if (target_motif or reference_motif) and (target_chains or reference_chains):
             raise ValueError(f"Either motif or chains can be specified for superimposition, but never both at the same time! Decide whether to superimpose over a selected chain or a selected motif.")
 
@@ -366,7 +366,7 @@ class ChainAdder(Runner):
         )
 
         # check for outputs
-        if output_exists(work_dir, poses) and not overwrite:
+        if _output_exists(work_dir, poses.df["poses"].str.rsplit("/", n=1).str[-1].to_list()) and not overwrite:
             return poses.change_poses_dir(work_dir, copy=False)
 
         # setup motif args (extra function)
@@ -380,20 +380,13 @@ class ChainAdder(Runner):
             reference_chains = reference_chains,
         )
 
-        # split input_dict into subdicts
-        split_sublists = jobstarters.split_list(list(input_dict.keys()), n_sublists=jobstarter.max_cores)
-        subdicts = [{target: input_dict[target] for target in sublist} for sublist in split_sublists]
-
-        # write n=max_cores input_json files for add_chains_batch.py
-        json_files = []
-        for i, subdict in enumerate(subdicts, start=1):
-            opts_json_p = f"{work_dir}/add_chain_input_{str(i).zfill(4)}.json"
-            with open(opts_json_p, 'w', encoding="UTF-8") as f:
-                json.dump(subdict, f)
-            json_files.append(opts_json_p)
+        # write a single input_json for add_chains_batch.py, every command processes one shard of it
+        opts_json_p = f"{work_dir}/add_chain_input.json"
+        _write_input_json(input_dict, opts_json_p)
+        n_shards = min(jobstarter.max_cores, len(input_dict))
 
         # start add_chains_batch.py
-        cmds = [f"{self.python} {script_path} --input_json {json_f} --output_dir {work_dir}" for json_f in json_files]
+        cmds = [f"{self.python} {script_path} --input_json {opts_json_p} --output_dir {work_dir} --shard {i} --nshards {n_shards}" for i in range(n_shards)]
         jobstarter.start(
             cmds = cmds,
             jobname = f"add_chains_{prefix}",
@@ -410,27 +403,30 @@ class ChainAdder(Runner):
         if (target_motif or reference_motif) and (target_chains or reference_chains):
             raise ValueError(f"Either motif or chains can be specified for superimposition, but not both!")
 
-        # setup copy_chain and reference_pdb in output:
+        # setup copy_chain and reference_pdb columns:
         col_in_df(poses.df, ref_col)
         copy_chain_l = setup_chain_list(copy_chain, poses)
-        out_dict = {pose["poses"]: {"copy_chain": chain, "reference_pdb": os.path.abspath(pose[ref_col])} for pose, chain in zip(poses, copy_chain_l)}
-        #out_dict = {'target_motif': None, 'reference_motif': None, 'target_chains': None, 'reference_chains': None}
+        poses_arr = poses.df["poses"].to_numpy()
 
-        # if nothing is specified, return nothing.
-        if all ((opt is None for opt in [reference_motif, target_motif, reference_chains, target_chains])):
-            return out_dict
+        # resolve reference paths against a single getcwd() call instead of calling os.path.abspath per pose
+        cwd = os.getcwd()
+        refs_abs = [os.path.normpath(ref if os.path.isabs(ref) else os.path.join(cwd, ref)) for ref in map(os.fspath, poses.df[ref_col].to_list())]
 
-        # setup motif definitions
+        # setup optional motif or chain definitions (only one of them can be set, see safety check above)
+        opt_columns = {}
         if (target_motif or reference_motif):
-            for pose in poses:
-                out_dict[pose["poses"]]['target_motif'] = self.parse_motif(target_motif or reference_motif, pose)
-                out_dict[pose["poses"]]['reference_motif'] = self.parse_motif(reference_motif or target_motif, pose)
-
-        # setup chains definitions
+            opt_columns["target_motif"] = self._parse_motif_column(target_motif or reference_motif, poses)
+            opt_columns["reference_motif"] = self._parse_motif_column(reference_motif or target_motif, poses)
         if (target_chains or reference_chains):
-            for pose in poses:
-                out_dict[pose["poses"]]["target_chains"] = parse_chain(target_chains or reference_chains, pose)
-                out_dict[pose["poses"]]["reference_chains"] = parse_chain(reference_chains or target_chains, pose)
+            opt_columns["target_chains"] = _parse_chain_column(target_chains or reference_chains, poses)
+            opt_columns["reference_chains"] = _parse_chain_column(reference_chains or target_chains, poses)
+
+        # compile kwargs for every pose in a single pass
+        out_dict = {}
+        for i, (pose, ref, chain) in enumerate(zip(poses_arr, refs_abs, copy_chain_l)):
+            out_dict[pose] = {"copy_chain": chain, "reference_pdb": ref}
+            for opt, values in opt_columns.items():
+                out_dict[pose][opt] = values[i]
 
         return out_dict
 
@@ -492,6 +488,13 @@ class ChainAdder(Runner):
             raise ValueError(f"If string is passed as motif, it has to be a column of the poses.df DataFrame. Otherwise pass a ResidueSelection object.")
         raise TypeError(f"Unsupportet parameter type for motif: {type(motif)} - Only ResidueSelection or str allowed!")
 
+    def _parse_motif_column(self, motif: ResidueSelection|str, poses: Poses) -> list[str]:
+        '''Column-wise version of parse_motif(): returns the motif of every pose, reading a motif column only once.'''
+        if isinstance(motif, str) and motif in poses.df.columns:
+            return [sele.to_string() for sele in poses.df[motif].to_numpy()]
+        # the same motif for every pose, parse_motif() handles the conversion and raises on invalid input
+        return [self.parse_motif(motif, pd.Series(dtype=object))] * len(poses)
+
     def add_sequence(self, prefix: str, poses: Poses, seq: str = None, seq_col: str = None, sep: str = ":") -> None:
         """
         Add a sequence to the poses in .fa format.
@@ -565,17 +568,15 @@ class ChainAdder(Runner):
         sep = "" if sep is None else sep
 
         # iterate over poses and add in sequence
-        new_poses = []
+        new_fastas = []
         for pose, seq_ in zip(poses.poses_list(), seqs):
             # read fasta and add sequence.
-            desc, orig_seq = list(parse_fasta_to_dict(pose).items())[0]
+            desc, orig_seq = _read_single_fasta(pose)
             orig_seq += sep + seq_
+            new_fastas.append((f"{out_dir}/{desc}.fa", f">{desc}\n{orig_seq}"))
 
-            # store at new location
-            out_path = f"{out_dir}/{desc}.fa"
-            with open(out_path, 'w', encoding="UTF-8") as f:
-                f.write(f">{desc}\n{orig_seq}")
-            new_poses.append(out_path)
+        # store at new location
+        _write_files(new_fastas)
 
         # update poses.df['poses'] to new location
         poses.change_poses_dir(out_dir, copy=False)
@@ -634,17 +635,15 @@ class ChainAdder(Runner):
             os.makedirs(out_dir, exist_ok=True)
 
         # iterate over poses and add in sequence
-        new_poses = []
+        new_fastas = []
         for pose in poses.poses_list():
             # read fasta and add sequence.
-            desc, orig_seq = list(parse_fasta_to_dict(pose).items())[0]
+            desc, orig_seq = _read_single_fasta(pose)
             orig_seq += f"{sep}{orig_seq}" * (n_protomers - 1)
+            new_fastas.append((f"{out_dir}/{desc}.fa", f">{desc}\n{orig_seq}"))
 
-            # store at new location
-            out_path = f"{out_dir}/{desc}.fa"
-            with open(out_path, 'w', encoding="UTF-8") as f:
-                f.write(f">{desc}\n{orig_seq}")
-            new_poses.append(out_path)
+        # store at new location
+        _write_files(new_fastas)
 
         # update poses.df['poses'] to new location
         poses.change_poses_dir(out_dir, copy=False)
@@ -704,17 +703,70 @@ def setup_chain_list(chain_arg, poses: Poses) -> list[str]:
         if len(chain_arg) == 1:
             return [chain_arg for _ in poses]
         else:
-            return [pose[chain_arg] for pose in poses]
+            return poses.df[chain_arg].to_list()
     if isinstance(chain_arg, list) and len(chain_arg) == len(poses):
         return chain_arg
     raise ValueError(f"Inappropriate value for parameter :chain_arg:. Specify the chain (e.g. 'A'), the column where the chains are listed (e.g. 'chain_col') or give a list of chains the same length as poses.df (e.g. ['A', ...])")
 
+def _output_exists(work_dir: str, expected_names: list[str]) -> bool:
+    '''Checks if all files in :expected_names: are present in :work_dir: using a single directory scan.'''
+    if not os.path.isdir(work_dir):
+        return False
+    present = {entry.name for entry in os.scandir(work_dir) if entry.is_file()}
+    return all(name in present for name in expected_names)
+
+def _read_single_fasta(path: str) -> tuple[str, str]:
+    '''Reads description and sequence of the first record with a sequence in a .fasta file without parsing the whole file into a dict.
+    Lines before the first header and header-only records are skipped, as in parse_fasta_to_dict().'''
+    desc, seq_lines = None, []
+    with open(path, 'r', encoding="UTF-8") as f:
+        for line in f:
+            if line.startswith(">"):
+                if seq_lines:
+                    break
+                desc = line[1:].strip()
+            elif desc is not None and (stripped := line.strip()):
+                seq_lines.append(stripped)
+    if not seq_lines:
+        raise ValueError(f"No fasta record with a sequence found in {path}")
+    return desc, "".join(seq_lines)
+
+def _write_files(files: list[tuple[str, str]]) -> None:
+    '''Writes (path, content) pairs to disk. Larger batches are dispatched over a thread pool, because writing many small files is bound by filesystem metadata latency.'''
+    def write_file(file: tuple[str, str]) -> None:
+        path, content = file
+        with open(path, 'w', encoding="UTF-8") as f:
+            f.write(content)
+
+    if len(files) < IO_POOL_SIZE:
+        for file in files:
+            write_file(file)
+    else:
+        with ThreadPoolExecutor(max_workers=IO_POOL_SIZE) as executor:
+            list(executor.map(write_file, files))
+
+def _write_input_json(input_dict: dict, path: str) -> None:
+    '''Writes :input_dict: as json to :path:. Uses orjson if it is installed, otherwise falls back to the json module.'''
+    if orjson is not None:
+        with open(path, 'wb') as f:
+            f.write(orjson.dumps(input_dict, option=orjson.OPT_SERIALIZE_NUMPY))
+    else:
+        with open(path, 'w', encoding="UTF-8") as f:
+            json.dump(input_dict, f)
+
 def parse_chain(chain, pose: pd.Series) -> str:
     '''Sets up chain for add_chains_batch.py'''
     if isinstance(chain, str):
         return chain if len(chain) == 1 else pose[chain]
     raise TypeError(f"Inappropriate parameter type for parameter :chain: {type(chain)}. Only :str: allowed!")
 
+def _parse_chain_column(chain, poses: Poses) -> list[str]:
+    '''Column-wise version of parse_chain(): returns the chain of every pose, reading a chain column only once.'''
+    if isinstance(chain, str) and len(chain) > 1:
+        return poses.df[chain].to_list()
+    # the same chain for every pose, parse_chain() handles the conversion and raises on invalid input
+    return [parse_chain(chain, pd.Series(dtype=object))] * len(poses)
+
 class ChainRemover(Runner):
     """
     ChainRemover Class
@@ -881,10 +933,6 @@ class ChainRemover(Runner):
         - **Path Configuration:** Ensure the paths to the scripts and executables are correctly configured as per ProtFlow setup. Using default paths is recommended unless customization is necessary.
         - **JobStarter Integration:** The JobStarter object is used to manage job execution, ensuring processes are handled efficiently. If a JobStarter is not provided, the method will operate without it, but using one is recommended for better job management.
         """
-        def output_exists(work_dir: str, files_list: list[str]) -> bool:
-            '''checks if output of copying chains exists'''
-            return os.path.isdir(work_dir) and all(os.path.isfile(fn) for fn in files_list)
-
         # setup runner
         script_path = f"{AUXILIARY_RUNNER_SCRIPTS_DIR}/remove_chains_batch.py"
         work_dir, jobstarter = self.generic_run_setup(
@@ -894,10 +942,11 @@ class ChainRemover(Runner):
         )
 
         # define location of new poses:
-        poses.df[f"{prefix}_location"] = [os.path.join(work_dir, os.path.basename(pose)) for pose in poses.poses_list()]
+        basenames = poses.df["poses"].str.rsplit("/", n=1).str[-1]
+        poses.df[f"{prefix}_location"] = (work_dir + "/" + basenames).to_numpy()
 
         # check if output is present
-        if output_exists(work_dir, poses.df[f"{prefix}_location"].to_list()) and not overwrite:
+        if _output_exists(work_dir, basenames.to_list()) and not overwrite:
             return poses.change_poses_dir(work_dir, copy=False)
 
         # setup chains
@@ -912,19 +961,14 @@ class ChainRemover(Runner):
 
         # batch inputs to max_cores
         input_dict = {pose: chain for pose, chain in zip(poses.poses_list(), chain_list)}
-        split_sublists = jobstarters.split_list(list(input_dict.keys()), n_sublists=jobstarter.max_cores)
-        subdicts = [{target: input_dict[target] for target in sublist} for sublist in split_sublists]
+        n_shards = min(jobstarter.max_cores, len(input_dict))
 
-        # write cmds
-        json_files = []
-        for i, subdict in enumerate(subdicts, start=1):
-            opts_json_p = f"{work_dir}/remove_chain_input_{str(i).zfill(4)}.json"
-            with open(opts_json_p, 'w', encoding="UTF-8") as f:
-                json.dump(subdict, f)
-            json_files.append(opts_json_p)
+        # write a single input_json, every command processes one shard of it
+        opts_json_p = f"{work_dir}/remove_chain_input.json"
+        _write_input_json(input_dict, opts_json_p)
 
         # start remove_chains_batch.py
-        cmds = [f"{self.python} {script_path} --input_json {json_f} --output_dir {work_dir}" for json_f in json_files]
+        cmds = [f"{self.python} {script_path} --input_json {opts_json_p} --output_dir {work_dir} --shard {i} --nshards {n_shards}" for i in range(n_shards)]
         jobstarter.start(
             cmds = cmds,
             jobname = f"remove_chains_{prefix}",
@@ -67,13 +67,19 @@ Version
 """
 # general imports
 import os
+import json
+import re
 import time
+import errno
 import logging
-from glob import glob
-import shutil
+from concurrent.futures import ThreadPoolExecutor
 
 # dependencies
 import pandas as pd
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # custom
 import protflow.config
@@ -81,6 +87,11 @@ import protflow.jobstarters
 from protflow.runners import Runner, RunnerOutput
 from protflow.poses import Poses
 from protflow.jobstarters import JobStarter
+from protflow.utils.utils import IO_POOL_SIZE
+
+# options that are set by Rosetta.write_cmd() and must not be passed by the user
+_FORBIDDEN_OPTIONS = ['-out:path:all', '-in:file:s', '-out:prefix', '-out:file:scorefile', '-out:file:scorefile_format', ' -s ', '-scorefile_format']
+_FORBIDDEN_OPTIONS_RE = re.compile("|".join(re.escape(opt) for opt in _FORBIDDEN_OPTIONS))
 
 class Rosetta(Runner):
     """
@@ -186,6 +197,7 @@ class Rosetta(Runner):
         self.index_layers = 1
         self.jobstarter = jobstarter
         self.fail_on_missing_output_poses = fail_on_missing_output_poses
+        self._exec_cache: dict[tuple, str] = {}
 
     def __str__(self):
         return "rosetta.py"
@@ -230,20 +242,28 @@ class Rosetta(Runner):
 
         This method is designed to ensure that the Rosetta executable is properly set up and can be executed, facilitating the smooth running of Rosetta processes within the ProtFlow framework.
         """
+        # return cached executable if it was already resolved for this combination:
+        key = (script_path, rosetta_application)
+        if key in self._exec_cache:
+            return self._exec_cache[key]
+
         # if rosetta_application is not provided, check if script_path is executable:
         if not rosetta_application:
             if os.path.isfile(script_path) and os.access(script_path, os.X_OK):
+                self._exec_cache[key] = script_path
                 return script_path
             raise ValueError(f"Rosetta Executable not setup properly. Either provide executable through Runner.script_path or give directly to run(rosetta_application)")
 
         # if rosetta_application is provided, check if it is executable:
         if os.path.isfile(rosetta_application) and os.access(rosetta_application, os.X_OK):
+            self._exec_cache[key] = rosetta_application
             return rosetta_application
 
         # if rosetta_application is not executable, find it at script_dir/rosetta_executable and check if this is executable:
         if os.path.isdir(script_path):
             combined_path = os.path.join(script_path, rosetta_application)
             if os.path.isfile(combined_path) and os.access(combined_path, os.X_OK):
+                self._exec_cache[key] = combined_path
                 return combined_path
             raise ValueError(f"Provided rosetta_applicatiaon is not executable: {combined_path}")
 
@@ -331,10 +351,13 @@ class Rosetta(Runner):
             output = RunnerOutput(poses=poses, results=scores, prefix=prefix, index_layers=self.index_layers)
             return output.return_poses()
         elif overwrite and os.path.isdir(work_dir):
-            rosetta_scores = glob(os.path.join(work_dir, "r*_*_score.json"))
-            if len(rosetta_scores) > 0:
+            rosetta_scores = _list_score_json(work_dir)
+            if len(rosetta_scores) < IO_POOL_SIZE:
                 for score in rosetta_scores:
                     os.remove(score)
+            else:
+                with ThreadPoolExecutor(max_workers=IO_POOL_SIZE) as executor:
+                    list(executor.map(os.remove, rosetta_scores))
 
         # parse_options and pose_options:
         if not os.path.isdir(work_dir): os.makedirs(work_dir, exist_ok=True)
@@ -354,8 +377,8 @@ class Rosetta(Runner):
             output_path=f"{work_dir}/"
         )
 
-        # collect scores and rename pdbs.
-        time.sleep(10) # Rosetta does not have time to write the last score into the scorefile otherwise?
+        # Rosetta does not always finish writing the last scores before the jobs return, wait until scorefiles stop changing.
+        _wait_scorefiles_stable(work_dir, min_count=len(cmds), timeout=30)
 
         # collect scores
         scores = collect_scores(work_dir=work_dir)
@@ -422,15 +445,9 @@ class Rosetta(Runner):
 
         This method is designed to facilitate the construction of command strings for running Rosetta applications, making it easier for researchers and developers to execute and manage Rosetta simulations within the ProtFlow framework.
         """
-        # parse options
-        opts, flags = protflow.runners.parse_generic_options(options, pose_options, sep="-")
-        opts = " ".join([f"-{key}={value}" for key, value in opts.items()])
-        flags = " -" + " -".join(flags) if flags else ""
-
         # check if interfering options were set
-        forbidden_options = ['-out:path:all', '-in:file:s', '-out:prefix', '-out:file:scorefile', '-out:file:scorefile_format', ' -s ', '-scorefile_format']
-        if (options and any(opt in options for opt in forbidden_options)) or (pose_options and any(pose_opt in pose_options for pose_opt in forbidden_options)):
-            raise KeyError(f"options and pose_options must not contain any of {forbidden_options}")
+        if (options and _FORBIDDEN_OPTIONS_RE.search(options)) or (pose_options and _FORBIDDEN_OPTIONS_RE.search(pose_options)):
+            raise KeyError(f"options and pose_options must not contain any of {_FORBIDDEN_OPTIONS}")
 
         # parse options
         opts, flags = protflow.runners.parse_generic_options(options, pose_options)
@@ -477,42 +494,116 @@ def collect_scores(work_dir: str) -> pd.DataFrame:
 
     This function is designed to streamline the process of collecting and organizing Rosetta output data, making it easier for researchers and developers to analyze the results of Rosetta simulations within the ProtFlow framework.
     """
-    scorefiles = glob(os.path.join(work_dir, "r*_*_score.json"))
-    scores_l = []
-    for scorefile in scorefiles:
-        scores_l.append(pd.read_json(scorefile, typ='series'))
-    scores_df = pd.DataFrame(scores_l).reset_index(drop=True).rename(columns={"decoy": "raw_description"})
-    scores_df.loc[:, "description"] = scores_df["raw_description"].str.split("_").str[1:-1].str.join("_") + "_" + scores_df["raw_description"].str.split("_").str[0].str.replace("r", "")
+    # scan work_dir once and reuse the listing for scorefiles and raw output .pdb files
+    entries = [entry.name for entry in os.scandir(work_dir)]
+    scorefiles = [os.path.join(work_dir, name) for name in entries if _is_score_json(name)]
+    pdbs = [name for name in entries if name.startswith("r") and name.endswith(".pdb")]
+
+    def load_scorefile(scorefile: str) -> dict:
+        with open(scorefile, 'rb') as f:
+            data = f.read()
+        if orjson is not None:
+            try:
+                return orjson.loads(data)
+            except orjson.JSONDecodeError:
+                # orjson rejects NaN / Infinity literals that Rosetta can write for non-finite scores, json accepts them.
+                pass
+        return json.loads(data)
+
+    # reading many small scorefiles is I/O latency bound, overlap reads in a thread pool
+    if len(scorefiles) < IO_POOL_SIZE:
+        records = [load_scorefile(scorefile) for scorefile in scorefiles]
+    else:
+        with ThreadPoolExecutor(max_workers=IO_POOL_SIZE) as executor:
+            records = list(executor.map(load_scorefile, scorefiles))
+    scores_df = pd.DataFrame.from_records(records).reset_index(drop=True).rename(columns={"decoy": "raw_description"})
+
+    # r0001_<pose_description>_0001 -> <pose_description>_0001 (single regex pass extracts output index and pose description)
+    description_parts = scores_df["raw_description"].str.extract(r"^r(\d+)_(.*)_[^_]*$")
+    scores_df.loc[:, "description"] = description_parts[1] + "_" + description_parts[0]
 
     # wait for all Rosetta output files to appear in the output directory (for some reason, they are sometimes not there after the runs completed.)
-    while len(glob(f"{work_dir}/r*.pdb")) < len(scores_df):
-        time.sleep(1)
+    delay = 0.05
+    while len(pdbs) < len(scores_df):
+        time.sleep(delay)
+        delay = min(delay * 2, 1.0)
+        pdbs = _list_r_pdbs(work_dir)
 
     # rename .pdb files in work_dir to the reindexed names.
-    names_dict = scores_df[["raw_description", "description"]].to_dict()
     logging.info(f"Renaming and reindexing {len(scores_df)} Rosetta output .pdb files")
-    for oldname, newname in zip(names_dict["raw_description"].values(), names_dict["description"].values()):
-        shutil.move(f"{work_dir}/{oldname}.pdb", (nf := f"{work_dir}/{newname}.pdb"))
-        if not os.path.isfile(nf):
-            print(f"WARNING: Could not rename file {oldname} to {nf}\n Retrying renaming.")
-            shutil.move(f"{work_dir}/{oldname}.pdb", (nf := f"{work_dir}/{newname}.pdb"))
+    rename_pairs = [(f"{work_dir}/{oldname}.pdb", f"{work_dir}/{newname}.pdb") for oldname, newname in zip(scores_df["raw_description"], scores_df["description"]) if oldname != newname]
+    if len(rename_pairs) < IO_POOL_SIZE:
+        for old_path, new_path in rename_pairs:
+            _robust_rename(old_path, new_path)
+    else:
+        # renames are independent syscalls, overlap them in a thread pool (GIL is released during os.rename)
+        with ThreadPoolExecutor(max_workers=IO_POOL_SIZE) as executor:
+            list(executor.map(lambda pair: _robust_rename(*pair), rename_pairs))
 
     # Collect information of path to .pdb files into dataframe under "location" column
     scores_df.loc[:, "location"] = work_dir + "/" + scores_df["description"] + ".pdb"
 
     # safetycheck rename all remaining files with r*.pdb into proper filename:
-    if (remaining_r_pdbfiles := glob(f"{work_dir}/r*.pdb")):
+    renamed_pdbs = set(scores_df["raw_description"] + ".pdb")
+    if (remaining_r_pdbfiles := [name for name in pdbs if name not in renamed_pdbs]):
         for pdb_path in remaining_r_pdbfiles:
-            pdb_path = pdb_path.split("/")[-1]
             idx = pdb_path.split("_")[0].replace("r", "")
             new_name = "_".join(pdb_path.split("_")[1:-1]).replace(".pdb", "") + "_" + idx + ".pdb"
-            shutil.move(f"{work_dir}/{pdb_path}", f"{work_dir}/{new_name}")
+            _robust_rename(f"{work_dir}/{pdb_path}", f"{work_dir}/{new_name}")
 
     # reset index and write scores to file
     scores_df.reset_index(drop="True", inplace=True)
 
     return scores_df
 
+def _robust_rename(src: str, dst: str, attempts: int = 3) -> None:
+    """Renames :src: to :dst: with os.rename. Retries with exponential backoff if :src: is not (yet) visible, which can happen on network filesystems right after the jobs finished."""
+    for i in range(attempts):
+        try:
+            os.rename(src, dst)
+            return
+        except OSError as exc:
+            if exc.errno not in (errno.ENOENT, errno.ESTALE, errno.EBUSY) or i == attempts - 1:
+                raise
+            time.sleep(0.05 * (1 << i))
+
+def _is_score_json(name: str) -> bool:
+    """Checks if filename :name: is a Rosetta scorefile (r*_score.json) written by Rosetta.write_cmd()."""
+    return name.startswith("r") and name.endswith("_score.json")
+
+def _list_score_json(work_dir: str) -> list[str]:
+    """Returns paths to all Rosetta scorefiles (r*_score.json) in :work_dir: using a single os.scandir pass."""
+    return [entry.path for entry in os.scandir(work_dir) if _is_score_json(entry.name)]
+
+def _list_r_pdbs(work_dir: str) -> list[str]:
+    """Returns filenames of all raw Rosetta output .pdb files (r*.pdb) in :work_dir: using a single os.scandir pass."""
+    return [entry.name for entry in os.scandir(work_dir) if entry.name.startswith("r") and entry.name.endswith(".pdb")]
+
+def _wait_scorefiles_stable(work_dir: str, min_count: int, timeout: float = 30, interval: float = 0.2) -> None:
+    """Waits until at least :min_count: Rosetta scorefiles (r*_score.json) exist in :work_dir: and their sizes and mtimes are unchanged between two consecutive scans. Logs a warning and returns after :timeout: seconds."""
+    def snapshot() -> set[tuple]:
+        files = set()
+        for entry in os.scandir(work_dir):
+            if not _is_score_json(entry.name):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                # scorefile was removed or replaced after the directory scan, it shows up again in the next snapshot
+                continue
+            files.add((entry.name, stat.st_size, stat.st_mtime))
+        return files
+
+    deadline = time.monotonic() + timeout
+    previous = snapshot()
+    while time.monotonic() < deadline:
+        time.sleep(interval)
+        current = snapshot()
+        if current == previous and len(current) >= min_count:
+            return
+        previous = current
+    logging.warning(f"Scorefiles in {work_dir} did not stabilize within {timeout} seconds. Found {len(previous)} of {min_count} expected scorefiles.")
+
 def clean_rosetta_scorefile(path_to_file: str, out_path: str) -> str:
     """
     Cleans a faulty Rosetta scorefile.
@@ -548,15 +639,20 @@ def clean_rosetta_scorefile(path_to_file: str, out_path: str) -> str:
 
     This function is useful for ensuring that Rosetta scorefiles are properly formatted and free of inconsistencies, facilitating accurate data analysis.
     """
-    # read in file line-by-line:
-    with open(path_to_file, 'r', encoding="UTF-8") as f:
-        scores = [line.split() for line in list(f.readlines()[1:])]
-
-    # if any line has a different number of scores than the header (columns), that line will be removed.
-    scores_cleaned = [line for line in scores if len(line) == len(scores[0])]
-    logging.warning(f"{len(scores) - len(scores_cleaned)} scores were removed from Rosetta scorefile at {path_to_file}")
-
-    # write cleaned scores to file:
-    with open(out_path, 'w', encoding="UTF-8") as f:
-        f.write("\n".join([",".join(line) for line in scores_cleaned]))
+    # stream scorefile line-by-line into the cleaned file (first line is skipped, second line is the header):
+    removed = 0
+    with open(path_to_file, 'r', encoding="UTF-8") as f_in, open(out_path, 'w', encoding="UTF-8") as f_out:
+        next(f_in, None)
+        header = next(f_in, "").split()
+        f_out.write(",".join(header))
+
+        # if any line has a different number of scores than the header (columns), that line will be removed.
+        for line in f_in:
+            scores = line.split()
+            if len(scores) == len(header):
+                f_out.write("\n" + ",".join(scores))
+            else:
+                removed += 1
+
+    logging.warning(f"{removed} scores were removed from Rosetta scorefile at {path_to_file}")
     return out_path
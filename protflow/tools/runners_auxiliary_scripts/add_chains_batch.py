@@ -7,6 +7,7 @@ import os
 from Bio.PDB.Structure import Structure
 
 # customs
+from protflow.jobstarters import split_list
 from protflow.residues import ResidueSelection
 from protflow.utils.biopython_tools import add_chain, get_atoms, get_atoms_of_motif, load_structure_from_pdbfile, save_structure_to_pdbfile, superimpose
 
@@ -154,8 +155,12 @@ def main(args) -> None:
     # setup options:
     poses_dict = parse_input_json(args.input_json)
 
+    # only process the shard of targets assigned to this job
+    shard_targets = split_list(list(poses_dict), n_sublists=args.nshards)[args.shard] if args.nshards > 1 else list(poses_dict)
+
     # copy chains into poses and save
-    for target, opts in poses_dict.items():
+    for target in shard_targets:
+        opts = poses_dict[target]
         superimpose_add_chain_pdb(
             target_pdb = target,
             reference_pdb = opts["reference_pdb"],
@@ -174,6 +179,8 @@ if __name__ == "__main__":
     # inputs
     argparser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter)
     argparser.add_argument("--input_json", type=str, required=True, help="Path to json mapping of multiple PDBs (for batch runs). Every target can map any option possible for the superimposer. {'target': {'motif_chain': 'A', 'reference_chain': 'C', ...}, ...}")
+    argparser.add_argument("--shard", type=int, default=0, help="Index of the shard of --input_json targets that should be processed by this job.")
+    argparser.add_argument("--nshards", type=int, default=1, help="Number of shards --input_json is split into.")
 
     # outputs
     argparser.add_argument("--inplace", type=str, default="False")
@@ -6,6 +6,7 @@ import json
 from Bio.PDB.Structure import Structure
 
 # customs
+from protflow.jobstarters import split_list
 from protflow.utils.biopython_tools import load_structure_from_pdbfile, save_structure_to_pdbfile
 
 def remove_chain_from_pdb(pdb_path: str, chains: list[str]) -> Structure:
@@ -30,8 +31,12 @@ def main(args):
     with open(args.input_json, 'r', encoding="UTF-8") as f:
         input_dict = json.loads(f.read())
 
+    # only process the shard of pdbs assigned to this job
+    shard_pdbs = split_list(list(input_dict), n_sublists=args.nshards)[args.shard] if args.nshards > 1 else list(input_dict)
+
     # remove chains and save outputs
-    for pdb, chains in input_dict.items():
+    for pdb in shard_pdbs:
+        chains = input_dict[pdb]
         # remove chain
         pose = remove_chain_from_pdb(
             pdb_path = pdb,
@@ -52,6 +57,8 @@ if __name__ == "__main__":
     argparser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter)
     # inputs
     argparser.add_argument("--input_json", type=str, required=True, help="Path to json mapping of multiple PDBs (for batch runs). Every target .pdb should be mapped to a list of chains that should be removed: {'target': ['A', 'C'], ...}")
+    argparser.add_argument("--shard", type=int, default=0, help="Index of the shard of --input_json pdbs that should be processed by this job.")
+    argparser.add_argument("--nshards", type=int, default=1, help="Number of shards --input_json is split into.")
 
     # outputs
     argparser.add_argument("--inplace", type=str, default="False", help="Edit .pdb files inplace and don't save them at a new location.")
@@ -25,6 +25,9 @@ Authors
 Markus Braun, Adrian Tripp
 """
 
+# number of threads used for I/O-bound file operations (reads, writes, renames, unlinks); smaller batches are processed serially
+IO_POOL_SIZE = 16
+
 def parse_fasta_to_dict(fasta_path: str, encoding:str="UTF-8") -> dict[str:str]:
     '''
     Parses a FASTA file, converting it into a dictionary mapping sequence descriptions to sequences.